@@ -0,0 +1,96 @@
+import cupy as cp
+
+# CUDA source of the fused timestep: one thread per lattice cell, same update as the lbm_numba.make_step kernel.
+# F and F_new are float32 (NL, Ny, Nx) arrays, so direction i of cell (y, x) is at i*Ny*Nx + y*Nx + x.
+STEP_SOURCE = r'''
+extern "C" __global__
+void step(const float* F, float* F_new, const bool* cylinder, const float omega, const int Ny, const int Nx)
+{
+    const int x = blockDim.x * blockIdx.x + threadIdx.x;
+    const int y = blockDim.y * blockIdx.y + threadIdx.y;
+    if (x >= Nx || y >= Ny) {
+        return;
+    }
+    const int N = Ny * Nx;
+
+    const int y_prev = (y == 0) ? Ny - 1 : y - 1;  // Source row for directions moving in +y
+    const int y_next = (y == Ny - 1) ? 0 : y + 1;  // Source row for directions moving in -y
+    int x_prev = (x == 0) ? Nx - 1 : x - 1;  // Source column for directions moving in +x
+    int x_next = (x == Nx - 1) ? 0 : x + 1;  // Source column for directions moving in -x
+    // Inlet/outlet: the first and last columns copy their inward-moving populations from their neighbour
+    if (x_prev == 0) {
+        x_prev = 1;
+    }
+    if (x_next == Nx - 1) {
+        x_next = Nx - 2;
+    }
+
+    // Streaming Step: pull every population from the cell it came from
+    const float f0 = F[0 * N + y * Nx + x];
+    float f1 = F[1 * N + y_prev * Nx + x];
+    float f2 = F[2 * N + y_prev * Nx + x_prev];
+    float f3 = F[3 * N + y * Nx + x_prev];
+    float f4 = F[4 * N + y_next * Nx + x_prev];
+    float f5 = F[5 * N + y_next * Nx + x];
+    float f6 = F[6 * N + y_next * Nx + x_next];
+    float f7 = F[7 * N + y * Nx + x_next];
+    float f8 = F[8 * N + y_prev * Nx + x_next];
+
+    // Macroscopic fluid variables (density and momentum)
+    const float rho = f0 + f1 + f2 + f3 + f4 + f5 + f6 + f7 + f8;
+    float jx = f2 + f3 + f4 - f6 - f7 - f8;
+    float jy = f1 + f2 + f8 - f4 - f5 - f6;
+
+    // Bounce-back inside the cylinder: swap opposite directions and stop the fluid
+    if (cylinder[y * Nx + x]) {
+        float tmp;
+        tmp = f1; f1 = f5; f5 = tmp;
+        tmp = f2; f2 = f6; f6 = tmp;
+        tmp = f3; f3 = f7; f7 = tmp;
+        tmp = f4; f4 = f8; f8 = tmp;
+        jx = 0.0f;
+        jy = 0.0f;
+    }
+
+    // Collision Step: relax every population toward its equilibrium value (weights 4/9, 1/9, 1/36)
+    // In terms of momentum Feq_i = w_i * (rho + 3*cu + (4.5*cu**2 - 1.5*|j|**2) / rho), with cu = c_i . j
+    const float inv_rho = 1.0f / rho;  // The single division per cell
+    const float jsq = 1.5f * (jx * jx + jy * jy) * inv_rho;
+    const float w0 = 4.0f / 9.0f;
+    const float w1 = 1.0f / 9.0f;
+    const float w2 = 1.0f / 36.0f;
+    float cu;
+    F_new[0 * N + y * Nx + x] = f0 + omega * (w0 * (rho - jsq) - f0);
+    cu = jy;
+    F_new[1 * N + y * Nx + x] = f1 + omega * (w1 * (rho + 3.0f * cu + 4.5f * cu * cu * inv_rho - jsq) - f1);
+    cu = jx + jy;
+    F_new[2 * N + y * Nx + x] = f2 + omega * (w2 * (rho + 3.0f * cu + 4.5f * cu * cu * inv_rho - jsq) - f2);
+    cu = jx;
+    F_new[3 * N + y * Nx + x] = f3 + omega * (w1 * (rho + 3.0f * cu + 4.5f * cu * cu * inv_rho - jsq) - f3);
+    cu = jx - jy;
+    F_new[4 * N + y * Nx + x] = f4 + omega * (w2 * (rho + 3.0f * cu + 4.5f * cu * cu * inv_rho - jsq) - f4);
+    cu = -jy;
+    F_new[5 * N + y * Nx + x] = f5 + omega * (w1 * (rho + 3.0f * cu + 4.5f * cu * cu * inv_rho - jsq) - f5);
+    cu = -jx - jy;
+    F_new[6 * N + y * Nx + x] = f6 + omega * (w2 * (rho + 3.0f * cu + 4.5f * cu * cu * inv_rho - jsq) - f6);
+    cu = -jx;
+    F_new[7 * N + y * Nx + x] = f7 + omega * (w1 * (rho + 3.0f * cu + 4.5f * cu * cu * inv_rho - jsq) - f7);
+    cu = -jx + jy;
+    F_new[8 * N + y * Nx + x] = f8 + omega * (w2 * (rho + 3.0f * cu + 4.5f * cu * cu * inv_rho - jsq) - f8);
+}
+'''
+step_kernel = cp.RawKernel(STEP_SOURCE, 'step')
+
+# Threads per block: consecutive x in a warp so every population load and store is coalesced
+BLOCK_X = 64
+BLOCK_Y = 4
+
+def step(F, F_new, cylinder, tau):
+    """
+    Advance the distribution function F (NL, Ny, Nx) by one timestep on the GPU and write the result into F_new.
+    F and F_new must be C-contiguous float32 CuPy arrays and cylinder a boolean CuPy array of shape (Ny, Nx).
+    """
+    Ny = F.shape[1]
+    Nx = F.shape[2]
+    grid = ((Nx + BLOCK_X - 1) // BLOCK_X, (Ny + BLOCK_Y - 1) // BLOCK_Y)
+    step_kernel(grid, (BLOCK_X, BLOCK_Y), (F, F_new, cylinder, cp.float32(1 / tau), cp.int32(Ny), cp.int32(Nx)))
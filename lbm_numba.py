@@ -0,0 +1,95 @@
+import numpy as np
+from numba import njit, prange
+
+# Explicit signature: the kernel is compiled once in make_step() instead of on the first call
+STEP_SIGNATURE = 'void(float32[:, :, ::1], float32[:, :, ::1], boolean[:, ::1])'
+
+# Template of the step kernel for one lattice size and relaxation time, see step_source().
+# The {placeholders} are filled with literals so LLVM folds the grid bounds and relaxation constants into immediates.
+# Every float constant is wrapped in f32() (np.float32): a bare Python float is a float64 to Numba and would promote
+# the whole update to double precision.
+STEP_TEMPLATE = """
+def step(F, F_new, cylinder):
+    for y in prange({Ny}):
+        y_prev = y - 1 if y > 0 else {Ny_last}  # Source row for directions moving in +y
+        y_next = y + 1 if y < {Ny_last} else 0  # Source row for directions moving in -y
+        for x in range({Nx}):
+            # Source columns for directions moving in +x and -x, with periodic wrap.
+            # Inlet/outlet: the first and last columns copy their inward-moving populations from their neighbour
+            x_prev = x - 1 if x > 1 else ({Nx_last} if x == 0 else 1)
+            x_next = x + 1 if x < {Nx_last2} else (0 if x == {Nx_last} else {Nx_last2})
+
+            # Streaming Step: pull every population from the cell it came from
+{loads}
+
+            # Macroscopic fluid variables (density and momentum)
+            rho = {rho}
+            jx = {jx}
+            jy = {jy}
+
+            # Bounce-back inside the cylinder: swap opposite directions and stop the fluid
+            if cylinder[y, x]:
+{bounce_back}
+                jx = f32(0)
+                jy = f32(0)
+
+            # Collision Step: relax every population toward its equilibrium value
+            # In terms of momentum Feq_i = w_i * (rho + 3*cu + (4.5*cu**2 - 1.5*|j|**2) / rho), with cu = c_i . j
+            inv_rho = f32(1) / rho  # The single division per cell
+            jsq = f32(1.5) * (jx * jx + jy * jy) * inv_rho
+{collisions}
+"""
+
+def step_source(Ny, Nx, tau, cxs, cys, weights):
+    """
+    Return the Python source of the step kernel for an (Ny, Nx) lattice and relaxation time tau.
+    cxs, cys and weights are the lattice speeds and weights as tuples, in the direction order of F.
+    The 9 direction bodies are written out without any loop and every constant, including the folded
+    1 - 1/tau and w_i/tau factors, is a literal.
+    """
+    omega = 1 / float(tau)
+    row = {1: "y_prev", 0: "y", -1: "y_next"}  # Source row of a population moving by cy
+    col = {1: "x_prev", 0: "x", -1: "x_next"}  # Source column of a population moving by cx
+    indent = " " * 12
+
+    def signed_sum(terms, coefficients):
+        # Sum of the terms with coefficient +1 minus the terms with coefficient -1, e.g. "jx - jy" or "f2 + f3 - f6"
+        expression = ""
+        for term, c in zip(terms, coefficients):
+            if c != 0:
+                expression += (" + " if c > 0 else " - ") + term
+        return expression[3:] if expression.startswith(" + ") else "-" + expression[3:]
+
+    f = ["f%d" % i for i in range(len(cxs))]
+    loads, bounce_back, collisions = [], [], []
+    for i, (cx, cy, w) in enumerate(zip(cxs, cys, weights)):
+        loads.append(f"{indent}f{i} = F[{i}, {row[cy]}, {col[cx]}]")
+        opposite = list(zip(cxs, cys)).index((-cx, -cy))
+        if i < opposite:
+            bounce_back.append(f"{indent}    f{i}, f{opposite} = f{opposite}, f{i}")
+        # F_new_i = (1 - omega) * f_i + omega * w_i * (rho + 3*cu + 4.5*cu**2/rho - jsq)
+        collision = f"f32({1 - omega!r}) * f{i} + f32({omega * w!r}) * (rho - jsq)"
+        if (cx, cy) != (0, 0):
+            cu = signed_sum(("jx", "jy"), (cx, cy))
+            collisions.append(f"{indent}cu = {cu}")
+            collision += f" + f32({3 * omega * w!r}) * cu + f32({4.5 * omega * w!r}) * cu * cu * inv_rho"
+        collisions.append(f"{indent}F_new[{i}, y, x] = {collision}")
+
+    return STEP_TEMPLATE.format(
+        Ny=Ny, Nx=Nx, Ny_last=Ny - 1, Nx_last=Nx - 1, Nx_last2=Nx - 2,
+        loads="\n".join(loads), rho=" + ".join(f), jx=signed_sum(f, cxs), jy=signed_sum(f, cys),
+        bounce_back="\n".join(bounce_back), collisions="\n".join(collisions),
+    )
+
+def make_step(Ny, Nx, tau, cxs, cys, weights):
+    """
+    Compile the kernel of step_source(Ny, Nx, tau, cxs, cys, weights) and return it as step(F, F_new, cylinder).
+    The kernel advances the distribution function F (NL, Ny, Nx) by one timestep and writes the result into F_new.
+    Inlet/outlet boundaries, streaming, cylinder bounce-back and collision are fused into a single pass:
+    every cell pulls its 9 populations from its neighbours, computes density and momentum and relaxes toward equilibrium.
+    F and F_new must be C-contiguous float32 arrays and cylinder a C-contiguous boolean mask.
+    The kernel is built from generated source, so Numba cannot cache it on disk and compiles it again on every run.
+    """
+    namespace = {"prange": prange, "f32": np.float32}
+    exec(compile(step_source(Ny, Nx, tau, cxs, cys, weights), "<lbm_numba.make_step>", "exec"), namespace)
+    return njit(STEP_SIGNATURE, parallel=True, fastmath=True, boundscheck=False)(namespace["step"])
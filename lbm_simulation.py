@@ -1,14 +1,31 @@
+from functools import partial
+
 import matplotlib.pyplot as plt
 import numpy as np
 
 plot_every = 100  # Defines how often the simulation will plot the velocity field
+backend = "numba"  # Time-step implementation: "numba" (fused JIT kernel, see lbm_numba.py), "cython" (see lbm_kernel.pyx),
+                   # "cupy" (GPU kernel, see lbm_cupy.py), "numexpr" or "numpy"
+
+# Collision step of one direction, F + (Feq - F)/tau, for the "numexpr" backend.
+# NumExpr evaluates it in a single threaded pass without temporaries; integer constants keep it in the precision of F.
+NUMEXPR_COLLISION = "F + (w*(rho + 3*(cx*jx + cy*jy) + (9*(cx*jx + cy*jy)**2 - 3*(jx**2 + jy**2))/(2*rho)) - F) * omega"
 
-def distance(x1, y1, x2, y2):
+# Lattice speeds and corresponding weights for the D2Q9 model (9 directions)
+CXS = (0, 0, 1, 1, 1, 0, -1, -1, -1)  # x-components of the discrete velocity directions
+CYS = (0, 1, 1, 0, -1, -1, -1, 0, 1)  # y-components of the discrete velocity directions
+WEIGHTS = (4/9, 1/9, 1/36, 1/9, 1/36, 1/9, 1/36, 1/9, 1/36)  # Weights for each velocity direction (must sum to 1)
+
+def periodic_shift_slices(shift):
     """
-    Calculate Euclidean distance between two points (x1, y1) and (x2, y2).
-    This is used to determine which cells belong to the cylinder boundary.
+    Return (destination, source) slice pairs that shift an axis by `shift` (-1, 0 or 1) with periodic wrap.
+    Copying every source slice into its destination slice gives the same result as np.roll, without allocating.
     """
-    return np.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+    if shift == 1:
+        return [(slice(1, None), slice(None, -1)), (slice(0, 1), slice(-1, None))]
+    if shift == -1:
+        return [(slice(None, -1), slice(1, None)), (slice(-1, None), slice(0, 1))]
+    return [(slice(None), slice(None))]
 
 def main():
     """ 
@@ -19,77 +36,196 @@ def main():
     # Simulation parameters
     Nx = 400    # Number of grid points in the x-direction (horizontal resolution)
     Ny = 100    # Number of grid points in the y-direction (vertical resolution)
-    tau = 0.65   # Relaxation time for collision (controls the viscosity of the fluid)
+    dtype = np.float32  # Working precision: single precision halves the memory traffic and is stable for this tau
+                        # (the "numba", "cython" and "cupy" kernels are compiled for float32 only)
+    tau = dtype(0.65)   # Relaxation time for collision (controls the viscosity of the fluid)
     Nt = 5000   # Number of timesteps for the simulation
     plotRealTime = True  # Whether to plot the velocity field in real-time as the simulation runs
     
-    # Lattice speeds and corresponding weights for the D2Q9 model (9 directions)
-    NL = 9  # Number of lattice directions (D2Q9 has 9 discrete velocities)
-    idxs = np.arange(NL)  # Array of indices for the directions
-    cxs = np.array([0, 0, 1, 1, 1, 0, -1, -1, -1])  # x-components of the discrete velocity directions
-    cys = np.array([0, 1, 1, 0, -1, -1, -1, 0, 1])  # y-components of the discrete velocity directions
-    weights = np.array([4/9, 1/9, 1/36, 1/9, 1/36, 1/9, 1/36, 1/9, 1/36])  # Weights for each velocity direction (must sum to 1)
+    # Lattice speeds and weights as arrays in the working precision, so multiplying them with F never upcasts it
+    NL = len(CXS)  # Number of lattice directions (D2Q9 has 9 discrete velocities)
+    cxs = np.asarray(CXS, dtype=dtype)
+    cys = np.asarray(CYS, dtype=dtype)
+    weights = np.asarray(WEIGHTS, dtype=dtype)
     
     # Initial Conditions: 
-    # F is the distribution function that contains particle populations at each grid point for each velocity direction
-    F = np.ones((Ny, Nx, NL)) + 0.01 * np.random.randn(Ny, Nx, NL)  # Slightly perturb the initial density to introduce turbulence
-    F[:, :, 3] = 2.3  # Bias the initial distribution to introduce some flow in the positive x-direction (inlet flow)
+    # F is the distribution function that contains particle populations at each grid point for each velocity direction.
+    # It is stored direction-major (NL, Ny, Nx) so that every direction is a contiguous plane in memory.
+    F = (np.ones((NL, Ny, Nx)) + 0.01 * np.random.randn(NL, Ny, Nx)).astype(dtype)  # Slightly perturb the initial density to introduce turbulence
+    F[3] = 2.3  # Bias the initial distribution to introduce some flow in the positive x-direction (inlet flow)
     
     # Cylinder Obstacle: create a mask for the cylinder in the grid
-    cylinder = np.full((Ny, Nx), False)  # Boolean mask representing the cylinder (False means no obstacle)
     cylinder_diameter = 13  # Diameter of the cylinder
-    # Iterate over the grid and mark the points that belong to the cylinder
-    for y in range(0, Ny):
-        for x in range(0, Nx):
-            if distance(Nx//4, Ny//2, x, y) < cylinder_diameter:  # If within the cylinder radius, mark it as part of the obstacle
-                cylinder[y, x] = True
+    # Mark every grid point within the cylinder radius of (Nx//4, Ny//2) as part of the obstacle.
+    # Squared distances are compared over a broadcast grid, so no per-cell Python loop or sqrt is needed.
+    Y, X = np.ogrid[:Ny, :Nx]
+    cylinder = (X - Nx//4)**2 + (Y - Ny//2)**2 < cylinder_diameter**2  # Boolean mask representing the cylinder (False means no obstacle)
+    # The NumPy timestep only uses index lists of the ~500 obstacle cells; the mask itself is only read by the compiled kernels.
+    # Indices stay np.intp so NumPy does not convert them on every fancy-indexing call.
+    cyl_idx = np.flatnonzero(cylinder)  # Flat (y*Nx + x) indices of the obstacle cells
+    bounce_back = np.array([0, 5, 6, 7, 8, 1, 2, 3, 4])  # Opposite direction of every lattice direction
+    # Flat indices into F of every moving population inside the obstacle, and of the population in the opposite direction.
+    # Bounce-back swaps the pairs (1, 5), (2, 6), (3, 7), (4, 8); the rest direction 0 is its own opposite and is left out.
+    moving = np.arange(1, NL)
+    cyl_dst = (moving[:, None] * (Ny * Nx) + cyl_idx).ravel()
+    cyl_src = (bounce_back[moving, None] * (Ny * Nx) + cyl_idx).ravel()
+
+    # Streaming buffers: particles are shifted from F into F_new, then the two arrays are swapped
+    F_new = np.empty_like(F)
+    # Precompute the (y_dst, x_dst, y_src, x_src) block copies that shift each direction by (cy, cx) with periodic wrap
+    stream_blocks = [
+        [(y_dst, x_dst, y_src, x_src)
+         for y_dst, y_src in periodic_shift_slices(cy)
+         for x_dst, x_src in periodic_shift_slices(cx)]
+        for cx, cy in zip(CXS, CYS)
+    ]
+
+    if backend not in ("numba", "cython", "cupy", "numexpr", "numpy"):
+        raise ValueError(f'Unknown backend "{backend}", expected "numba", "cython", "cupy", "numexpr" or "numpy"')
+    # The compiled kernels are typed for float32, check here instead of failing inside the first call
+    if backend in ("numba", "cython", "cupy") and dtype != np.float32:
+        raise ValueError(f'backend = "{backend}" only supports dtype = np.float32, got {np.dtype(dtype).name}')
+
+    if backend == "numba":
+        from lbm_numba import make_step  # Only needed (and only requires numba) for the fused kernel
+        step = make_step(Ny, Nx, tau, CXS, CYS, WEIGHTS)  # Kernel generated with the lattice, its size and tau compiled in as constants
+    elif backend == "cython":
+        from lbm_kernel import step  # Compiled extension, build it with: python setup.py build_ext --inplace
+        step = partial(step, tau=tau)
+        cylinder = cylinder.view(np.uint8)  # The Cython kernel takes the mask as bytes
+    elif backend == "cupy":
+        import cupy as cp
+        from lbm_cupy import step  # Fused CUDA kernel
+        step = partial(step, tau=tau)
+        # Keep the lattice on the GPU for the whole run; only the plotted fields are copied back
+        F, F_new = cp.asarray(F), cp.asarray(F_new)
+        cylinder, cyl_idx = cp.asarray(cylinder), cp.asarray(cyl_idx)
+    elif backend == "numexpr":
+        import numexpr as ne  # Only needed for the fused collision expression
+
+    omega = 1 / tau  # Relaxation rate of the collision step
+
+    if backend in ("numpy", "numexpr"):
+        # Work arrays for the fluid variables and the collision, allocated once and overwritten with out= every timestep
+        rho = np.empty((Ny, Nx), dtype=dtype)  # Fluid density
+        jx = np.empty_like(rho)  # x-component of fluid momentum
+        jy = np.empty_like(rho)  # y-component of fluid momentum
+        inv_rho = np.empty_like(rho)  # 1 / rho
+        jsq = np.empty_like(rho)  # Energy term 1.5 * |j|**2 / rho
+        jy_sq = np.empty_like(rho)  # Scratch space for jy**2 while summing |j|**2
+        cu_diag = np.empty_like(rho)  # c_i . j of the diagonal directions 2 and 6
+        cu_anti = np.empty_like(rho)  # c_i . j of the anti-diagonal directions 4 and 8
+        Feq_common = np.empty_like(rho)  # Terms shared by opposite directions
+        Feq_linear = np.empty_like(rho)  # First-order term, which changes sign between opposite directions
+
+    # Real-time visualization: one persistent image whose data is replaced on every plotted timestep
+    fig, ax = plt.subplots()
+    im = ax.imshow(np.zeros((Ny, Nx)))
+    plt.show(block=False)
 
     # Main loop: This loop runs the simulation for Nt timesteps
     for it in range(Nt):
         # print(it)  # Print the current timestep for monitoring progress
 
-        # Boundary Conditions: Set reflective boundary conditions on the left (inlet) and right (outlet) boundaries
-        F[:, -1, [6, 7, 8]] = F[:, -2, [6, 7, 8]]  # Reflect the distributions at the outlet (right boundary)
-        F[:, 0, [2, 3, 4]] = F[:, 1, [2, 3, 4]]   # Reflect the distributions at the inlet (left boundary)
-
-        # Streaming Step: Move particles to their neighboring cells based on their velocity directions (lattice shift)
-        for i, cx, cy in zip(range(NL), cxs, cys):
-            F[:, :, i] = np.roll(F[:, :, i], cx, axis=1)  # Shift the distribution along the x-direction
-            F[:, :, i] = np.roll(F[:, :, i], cy, axis=0)  # Shift the distribution along the y-direction
-
-        # Apply boundary conditions to the cylinder obstacle
-        # Reverse the direction of incoming particles at the obstacle boundary (bounce-back rule)
-        bndryF = F[cylinder, :].copy()  # Copy the distributions at the cylinder boundary to apply boundary conditions
-        bndryF = bndryF[:, [0, 5, 6, 7, 8, 1, 2, 3, 4]]  # Reverse the directions of the distribution at the boundary (bounce-back)
-        
-        # Calculate macroscopic fluid variables (density and velocity)
-        rho = np.sum(F, axis=2)  # Fluid density (summed over all velocity directions)
-        ux = np.sum(F * cxs, axis=2) / rho  # x-component of fluid velocity (momentum in x-direction divided by density)
-        uy = np.sum(F * cys, axis=2) / rho  # y-component of fluid velocity (momentum in y-direction divided by density)
-
-        # Set velocity to zero inside the cylinder (no fluid flow inside the obstacle)
-        F[cylinder, :] = bndryF  # Apply bounce-back boundary conditions to the cylinder
-        ux[cylinder] = 0  # Set x-velocity to zero inside the cylinder
-        uy[cylinder] = 0  # Set y-velocity to zero inside the cylinder
-
-        # Collision Step: Apply the Lattice Boltzmann collision operator (relaxation toward equilibrium)
-        Feq = np.zeros(F.shape)  # Initialize the equilibrium distribution function
-        # Compute the equilibrium distribution based on the current macroscopic variables (rho, ux, uy)
-        for i, cx, cy, w in zip(range(NL), cxs, cys, weights):
-            Feq[:, :, i] = rho * w * (
-                1 + 3 * (cx * ux + cy * uy) +  # First-order term (linear velocity)
-                9 * (cx * ux + cy * uy)**2 / 2 -  # Second-order term (velocity squared)
-                3 * (ux**2 + uy**2) / 2  # Energy term (velocity magnitude squared)
-            )
-
-        # Relaxation step: update the distribution function toward the equilibrium (collide step)
-        F += -(1/tau) * (F - Feq)  # Perform the collision step with relaxation time tau
+        if backend in ("numba", "cython", "cupy"):
+            # Boundary conditions, streaming, bounce-back and collision in a single pass over the lattice
+            step(F, F_new, cylinder)
+            F, F_new = F_new, F
+
+            # Density and momentum are only needed for plotting
+            if it % plot_every == 0:
+                rho = F.sum(axis=0)
+                jx = F[2] + F[3] + F[4] - F[6] - F[7] - F[8]
+                jy = F[1] + F[2] + F[8] - F[4] - F[5] - F[6]
+                jx.ravel()[cyl_idx] = 0
+                jy.ravel()[cyl_idx] = 0
+                if backend == "cupy":
+                    rho, jx, jy = rho.get(), jx.get(), jy.get()
+        else:
+            # Boundary Conditions: Set reflective boundary conditions on the left (inlet) and right (outlet) boundaries
+            # Directions 6-8 (cx = -1) and 2-4 (cx = +1) are consecutive, so basic slices copy them without a fancy-index gather
+            F[6:9, :, -1] = F[6:9, :, -2]  # Reflect the distributions at the outlet (right boundary)
+            F[2:5, :, 0] = F[2:5, :, 1]   # Reflect the distributions at the inlet (left boundary)
+
+            # Streaming Step: Move particles to their neighboring cells based on their velocity directions (lattice shift)
+            for i in range(NL):
+                for y_dst, x_dst, y_src, x_src in stream_blocks[i]:
+                    F_new[i, y_dst, x_dst] = F[i, y_src, x_src]  # Shift the distribution along the x- and y-direction
+            F, F_new = F_new, F  # The streamed populations become the current distribution
+
+            # Apply boundary conditions to the cylinder obstacle
+            # Reverse the direction of incoming particles at the obstacle boundary (bounce-back rule).
+            # This only permutes populations within a cell, so it does not change the density below.
+            F.ravel()[cyl_dst] = F.ravel()[cyl_src]  # One flat gather and scatter over the obstacle populations
+
+            # Calculate macroscopic fluid variables (density and momentum)
+            # The collision only needs the momentum j = rho * u, so the velocity itself is only computed for plotting
+            np.sum(F, axis=0, out=rho)  # Fluid density (summed over all velocity directions)
+            # Momentum sums only add/subtract the directions with a nonzero velocity component (cx, cy are 0 or +-1)
+            np.add(F[2], F[3], out=jx)  # x-component of fluid momentum: F2 + F3 + F4 - F6 - F7 - F8
+            jx += F[4]
+            jx -= F[6]
+            jx -= F[7]
+            jx -= F[8]
+            np.add(F[1], F[2], out=jy)  # y-component of fluid momentum: F1 + F2 + F8 - F4 - F5 - F6
+            jy += F[8]
+            jy -= F[4]
+            jy -= F[5]
+            jy -= F[6]
+
+            # Set momentum to zero inside the cylinder (no fluid flow inside the obstacle)
+            jx.ravel()[cyl_idx] = 0  # Set x-momentum to zero inside the cylinder
+            jy.ravel()[cyl_idx] = 0  # Set y-momentum to zero inside the cylinder
+
+            # Collision Step: Apply the Lattice Boltzmann collision operator (relaxation toward equilibrium)
+            # In terms of momentum the equilibrium is Feq_i = w_i * (rho + 3*cu + (9*cu**2 - 3*|j|**2) / (2*rho)), cu = c_i . j
+            if backend == "numexpr":
+                for i, cx, cy, w in zip(range(NL), cxs, cys, weights):
+                    ne.evaluate(NUMEXPR_COLLISION, out=F[i], local_dict={
+                        'F': F[i], 'rho': rho, 'jx': jx, 'jy': jy, 'cx': cx, 'cy': cy, 'w': w, 'omega': omega})
+            else:
+                # F <- (1 - 1/tau) * F + (1/tau) * Feq, applied direction by direction so Feq is never stored as a full array
+                # Every operation writes into a preallocated work array, so no temporaries are created
+                F *= 1 - omega  # Keep the (1 - 1/tau) share of the current distribution
+                np.divide(1, rho, out=inv_rho)  # The single division per cell, the equilibrium below only multiplies
+                # Add the equilibrium distribution based on the current macroscopic variables (rho, jx, jy)
+                # Energy term 1.5 * |j|**2 / rho (momentum magnitude squared), shared by all directions
+                np.multiply(jx, jx, out=jsq)
+                np.multiply(jy, jy, out=jy_sq)
+                jsq += jy_sq
+                jsq *= inv_rho
+                jsq *= 1.5
+                # The rest direction has no linear or second-order term
+                np.subtract(rho, jsq, out=Feq_common)
+                Feq_common *= omega * weights[0]
+                F[0] += Feq_common
+                # Directions i and i+4 are opposite: they share the weight and cu**2, only the linear term changes sign
+                np.add(jx, jy, out=cu_diag)
+                np.subtract(jx, jy, out=cu_anti)
+                for i, cu in ((1, jy), (2, cu_diag), (3, jx), (4, cu_anti)):
+                    # Second-order and energy terms: omega * w * (rho + 4.5 * cu**2 / rho - jsq)
+                    np.multiply(cu, cu, out=Feq_common)
+                    Feq_common *= inv_rho
+                    Feq_common *= 4.5
+                    Feq_common += rho
+                    Feq_common -= jsq
+                    Feq_common *= omega * weights[i]
+                    # First-order term (linear momentum): omega * w * 3 * cu
+                    np.multiply(cu, omega * weights[i] * 3, out=Feq_linear)
+                    F[i] += Feq_common
+                    F[i] += Feq_linear
+                    F[i + 4] += Feq_common
+                    F[i + 4] -= Feq_linear
 
         # Real-time visualization: Plot the velocity field every 'plot_every' timesteps
         if it % plot_every == 0:
-            plt.imshow(np.sqrt(ux**2 + uy**2))  # Plot the magnitude of the velocity field (sqrt(ux^2 + uy^2))
-            plt.pause(0.01)  # Pause briefly to display the plot
-            plt.cla()  # Clear the plot for the next timestep
+            ux = jx / rho  # x-component of fluid velocity (momentum in x-direction divided by density)
+            uy = jy / rho  # y-component of fluid velocity (momentum in y-direction divided by density)
+            speed = np.hypot(ux, uy)  # Magnitude of the velocity field (sqrt(ux^2 + uy^2)) in one pass
+            im.set_data(speed)  # Update the existing image instead of drawing a new one
+            im.set_clim(speed.min(), speed.max())  # Rescale the colors to the current frame, like a fresh imshow would
+            fig.canvas.draw_idle()
+            fig.canvas.flush_events()  # Let the window redraw without sleeping
 
 if __name__ == "__main__":
     main()  # Run the main simulation function
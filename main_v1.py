@@ -25,8 +25,8 @@ def main():
     
     # Initial Conditions + Add random condition / turbulence 
     #np.random.seed(42)
-    F = np.ones((Ny, Nx, NL)) + 0.01 * np.random.randn(Ny, Nx, NL)
-    F[:, :, 3] = 2.3
+    F = np.ones((NL, Ny, Nx)) + 0.01 * np.random.randn(NL, Ny, Nx)  # direction-major (SoA)
+    F[3] = 2.3
     cylinder = np.full((Ny, Nx), False)
     cylinder_diameter = 13
 
@@ -40,32 +40,32 @@ def main():
     for it in range(Nt):
         print(it)
 
-        F[:, -1, [ 6, 7, 8]] = F[:, -2, [ 6, 7, 8]]
-        F[:,  0, [ 2, 3, 4]] = F[:,  1, [ 2, 3, 4]] 
+        F[[6, 7, 8], :, -1] = F[[6, 7, 8], :, -2]
+        F[[2, 3, 4], :,  0] = F[[2, 3, 4], :,  1]
 
 
         # Streaming step
         for i, cx, cy in zip(range(NL), cxs, cys):
-            F[:, :, i] = np.roll(F[:, :, i], cx, axis=1)
-            F[:, :, i] = np.roll(F[:, :, i], cy, axis=0)
+            F[i] = np.roll(F[i], cx, axis=1)
+            F[i] = np.roll(F[i], cy, axis=0)
 
         # Apply boundary conditions
-        bndryF = F[cylinder, :]  # Copy to avoid overwriting
-        bndryF = bndryF[:, [0, 5, 6, 7, 8, 1, 2, 3, 4]]
+        bndryF = F[:, cylinder]  # Copy to avoid overwriting
+        bndryF = bndryF[[0, 5, 6, 7, 8, 1, 2, 3, 4], :]
 
         # Fluid variables
-        rho = np.sum(F, axis=2)  # Density
-        ux = np.sum(F * cxs, axis=2) / rho  # x-momentum
-        uy = np.sum(F * cys, axis=2) / rho  # y-momentum
+        rho = F.sum(axis=0)  # Density
+        ux = np.einsum('i,iyx->yx', cxs, F) / rho  # x-momentum
+        uy = np.einsum('i,iyx->yx', cys, F) / rho  # y-momentum
 
-        F[cylinder, :] = bndryF
+        F[:, cylinder] = bndryF
         ux[cylinder] = 0
         uy[cylinder] = 0
 
         # Collision step
         Feq = np.zeros(F.shape)
         for i, cx, cy, w in zip(range(NL), cxs, cys, weights):
-            Feq[:, :, i] = rho * w * (
+            Feq[i] = rho * w * (
                 1 + 3 * (cx * ux + cy * uy) +
                 9 * (cx * ux + cy * uy)**2 / 2 -
                 3 * (ux**2 + uy**2) / 2
@@ -0,0 +1,21 @@
+"""
+Build the Cython timestep kernel used by backend = "cython" in lbm_simulation.py:
+
+    python setup.py build_ext --inplace
+"""
+from Cython.Build import cythonize
+from setuptools import Extension, setup
+
+extensions = [
+    Extension(
+        "lbm_kernel",
+        ["lbm_kernel.pyx"],
+        extra_compile_args=["-O3", "-march=native", "-fopenmp", "-ffast-math"],
+        extra_link_args=["-fopenmp"],
+    )
+]
+
+setup(
+    name="lbm_kernel",
+    ext_modules=cythonize(extensions),
+)